@@ -0,0 +1,175 @@
+import argparse
+import contextlib
+import csv
+import json
+import os
+import sys
+import time
+import multiprocessing
+from collections import deque
+from multiprocessing.connection import wait
+from main import PACKING_METHODS, load_mapping_data, pipeline_summary
+from main_data import load_scenario
+from item_catalog import ItemCatalog
+from result_cache import ResultCache
+
+# 여러 시나리오 x 엔진을 프로세스 풀에서 실행하고 결과를 한 표로 정리하는 배치 실행기
+#   python batch.py 1-5,11,123 --engines original subvolume --placement-mode height_map --processes 4 \
+#       --timeout 600 --format csv -o summary.csv
+
+SUMMARY_FIELDS = ["scenario", "method", "status", "utilization", "packed_count", "unplaced_count",
+                  "total_operations", "unloading_cost", "reloading_count", "runtime"]
+
+
+def parse_scenarios(text):
+    # "1-5,11,123" -> ['1', '2', '3', '4', '5', '11', '123']
+    scenarios = []
+    for part in text.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part:
+            start, end = part.split('-', 1)
+            scenarios.extend(str(n) for n in range(int(start), int(end) + 1))
+        else:
+            scenarios.append(part)
+    return scenarios
+
+
+def run_task(scenario_number, packing_method, save, use_cache, verbose, engine_options, conn):
+    # Child process: one scenario with one engine, summary sent back through conn
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(sys.stdout if verbose else devnull):
+        try:
+            container_size, items = load_scenario(scenario_number)
+            summary = pipeline_summary(scenario_number, packing_method, container_size, ItemCatalog(items),
+                                       load_mapping_data(scenario_number), save,
+                                       ResultCache() if use_cache else None, engine_options)
+            summary["status"] = "ok"
+        except Exception as e:
+            summary = {"status": f"error: {type(e).__name__}: {e}"}
+    conn.send(summary)
+    conn.close()
+
+
+def run_batch(scenarios, packing_methods, processes=None, timeout=None, save=True, use_cache=True, verbose=False,
+              engine_options=None):
+    # Each task runs in its own process so a task over its timeout can be terminated
+    processes = processes or os.cpu_count() or 1
+    pending = deque((scenario_number, packing_method) for scenario_number in scenarios
+                    for packing_method in packing_methods)
+    running = {}
+    results = {}
+
+    while pending or running:
+        while pending and len(running) < processes:
+            task = pending.popleft()
+            parent_conn, child_conn = multiprocessing.Pipe(duplex=False)
+            process = multiprocessing.Process(target=run_task, args=(*task, save, use_cache, verbose,
+                                                                              engine_options, child_conn))
+            process.start()
+            child_conn.close()
+            running[parent_conn] = (task, process, time.perf_counter())
+            print(f"Started scenario {task[0]} ({task[1]})")
+
+        now = time.perf_counter()
+        wait_time = None
+        if timeout is not None:
+            wait_time = max(0, min(start + timeout for _, _, start in running.values()) - now)
+        for conn in wait(list(running), timeout=wait_time):
+            task, process, start = running.pop(conn)
+            try:
+                summary = conn.recv()
+            except EOFError:
+                summary = {"status": f"error: exited with code {process.exitcode}"}
+            process.join()
+            results[task] = summary
+            print(f"Finished scenario {task[0]} ({task[1]}): {summary['status']}")
+
+        if timeout is not None:
+            now = time.perf_counter()
+            for conn, (task, process, start) in list(running.items()):
+                if now - start >= timeout:
+                    process.terminate()
+                    process.join()
+                    running.pop(conn)
+                    results[task] = {"status": "timeout", "runtime": now - start}
+                    print(f"Timed out scenario {task[0]} ({task[1]}) after {timeout}s")
+
+    rows = []
+    for scenario_number in scenarios:
+        for packing_method in packing_methods:
+            row = dict.fromkeys(SUMMARY_FIELDS)
+            row.update(results[(scenario_number, packing_method)])
+            row["scenario"] = scenario_number
+            row["method"] = packing_method
+            rows.append({field: row[field] for field in SUMMARY_FIELDS})
+    return rows
+
+
+def format_table(rows):
+    def cell(value, width, spec=''):
+        return f"{format(value, spec) if value is not None else '-':>{width}}"
+
+    lines = [f"{'Scenario':<10}{'Method':<12}{'Status':<10}{'Utilization':>12}{'Unload cost':>13}"
+             f"{'Reloads':>9}{'Time (s)':>10}"]
+    for row in rows:
+        status = row["status"] if len(row["status"]) <= 9 else "error"
+        lines.append(f"{row['scenario']:<10}{row['method']:<12}{status:<10}{cell(row['utilization'], 12, '.2%')}"
+                     f"{cell(row['unloading_cost'], 13, '.4f')}{cell(row['reloading_count'], 9)}"
+                     f"{cell(row['runtime'], 10, '.1f')}")
+    return "\n".join(lines) + "\n"
+
+
+def write_summary(rows, output_format, output=None):
+    stream = open(output, 'w', newline='') if output else sys.stdout
+    try:
+        if output_format == "csv":
+            writer = csv.DictWriter(stream, fieldnames=SUMMARY_FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+        elif output_format == "json":
+            json.dump(rows, stream, indent=4)
+            stream.write("\n")
+        else:
+            stream.write(format_table(rows))
+    finally:
+        if output:
+            stream.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run packing, rearrangement and unloading over many scenarios.")
+    parser.add_argument("scenarios", help="scenario numbers and ranges, e.g. 1-5,11,123")
+    parser.add_argument("--engines", nargs="+", choices=list(PACKING_METHODS), default=list(PACKING_METHODS))
+    parser.add_argument("--processes", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--timeout", type=float, default=None, help="seconds per scenario/engine task")
+    parser.add_argument("--format", choices=["table", "csv", "json"], default="table", dest="output_format")
+    parser.add_argument("-o", "--output", default=None, help="summary file (default: stdout)")
+    parser.add_argument("--no-save", action="store_true", help="do not write the per-scenario result files")
+    parser.add_argument("--no-cache", action="store_true", help="do not reuse cached packing results")
+    parser.add_argument("--verbose", action="store_true", help="show the engines' progress output")
+    parser.add_argument("--placement-mode", default=None,
+                        help="grid, extreme_points or height_map (default: each engine's grid scan)")
+    parser.add_argument("--iterations", type=int, default=None, help="multi-start packings per task (seeds 0..N-1)")
+    parser.add_argument("--seeds", type=int, nargs="+", default=None, help="explicit multi-start seeds")
+    parser.add_argument("--pack-processes", type=int, default=1,
+                        help="processes per multi-start packing (default 1; tasks already run in parallel)")
+    args = parser.parse_args(argv)
+
+    engine_options = {"processes": args.pack_processes}
+    if args.placement_mode is not None:
+        engine_options["placement_mode"] = args.placement_mode
+    if args.iterations is not None:
+        engine_options["num_iterations"] = args.iterations
+    if args.seeds is not None:
+        engine_options["seeds"] = args.seeds
+
+    rows = run_batch(parse_scenarios(args.scenarios), args.engines, args.processes, args.timeout,
+                     save=not args.no_save, use_cache=not args.no_cache, verbose=args.verbose,
+                     engine_options=engine_options)
+    write_summary(rows, args.output_format, args.output)
+    return rows
+
+
+if __name__ == "__main__":
+    main()
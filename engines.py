@@ -0,0 +1,12 @@
+from heuristics import PackingAlgorithm as OriginalPackingAlgorithm
+from subvolume import PackingAlgorithm as SubvolumePackingAlgorithm
+from bl_ffhdc import PackingAlgorithm as BLFHPackingAlgorithm
+
+# 이름으로 선택할 수 있는 적재 엔진 목록
+ENGINES = {engine.name: engine for engine in (OriginalPackingAlgorithm, SubvolumePackingAlgorithm, BLFHPackingAlgorithm)}
+
+
+def create_engine(name, container_size, **options):
+    if name not in ENGINES:
+        raise ValueError(f"Unknown packing engine '{name}'. Choose one of {', '.join(ENGINES)}.")
+    return ENGINES[name](container_size[0], container_size[1], container_size[2], **options)
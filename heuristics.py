@@ -1,92 +1,22 @@
 import json 
 from main_data import create_scenario
+from item_catalog import ItemCatalog, Item
+from placement_engine import PlacementEngine
 
-class Item:
-    def __init__(self, id, width, length, height, weight, location):
-        self.id = id
-        self.width = int(width)
-        self.length = int(length)
-        self.height = int(height)
-        self.weight = weight
-        self.location = location
-        self.volume = self.width * self.length * self.height
 
-    def possible_orientations(self):
-        return [
-            (self.width, self.length, self.height),
-            (self.width, self.height, self.length),
-            (self.length, self.width, self.height)
-        ]
+class PackingAlgorithm(PlacementEngine):
+    name = 'original'
+    # 'grid': every integer position, 'extreme_points': corner points of placed boxes and walls,
+    # 'height_map': every (x, y) resting on the top surface of the packed boxes
+    placement_modes = ('grid', 'extreme_points', 'height_map')
+    min_support_ratio = 0.8
 
-
-class PackingAlgorithm:
-    def __init__(self, width, length, height):
-        self.width = int(width)
-        self.length = int(length)
-        self.height = int(height)
+    def __init__(self, width, length, height, placement_mode='grid'):
+        super().__init__(width, length, height, placement_mode)
         self.large_section_width = int(self.width * 0.7)
         self.small_section_width = self.width - self.large_section_width
-        self.best_packed_items = []
-        self.best_unplaced_items = []
         self.left_items = []
-        self.best_utilization = 0
-
-    def pack_items_with_permutations(self, items, num_iterations=1):
-        for i in range(num_iterations):
-            # Sort items by PO number (descending) and then by volume (descending)
-            items_sorted = sorted(items, key=lambda item: (-int(item.location[2:]), -item.volume))
-            
-            packed_items, unpacked_items = self.pack_items_by_po(items_sorted)
-            utilization = self.calculate_capacity_utilization(packed_items)
-
-            print(f"Iteration {i+1}/{num_iterations}, Utilization: {utilization:.2%}")
-
-            if utilization > self.best_utilization:
-                self.best_packed_items = packed_items
-                self.best_unplaced_items = unpacked_items  # Store the best unplaced items
-                self.best_utilization = utilization
-
-
-
-    def pack_items_by_po(self, sorted_items):
-        packed_items = []
-        unplaced_items = []
-        load_order = 0
-        current_po = None
-
-        for item in sorted_items:
-            if item.location != current_po:
-                current_po = item.location
-                print(f"Packing items for {current_po}")
-            
-            placed = False
-            best_position = None
-            best_orientation = None
-
-            for orientation in item.possible_orientations():
-                position = self.find_position(orientation, packed_items)
-                if position:
-                    if not best_position or self.is_better_position(position, best_position):
-                        best_position = position
-                        best_orientation = orientation
 
-            if best_position:
-                load_order += 1
-                packed_items.append({
-                    "id": item.id,
-                    "position": best_position,
-                    "orientation": best_orientation,
-                    "location": item.location,
-                    "load_order": load_order,
-                    "weight": item.weight
-                })
-                placed = True
-            
-            if not placed:
-                print(f"Unable to place item {item.id} from {item.location}")
-                unplaced_items.append(item)
-
-        return packed_items, unplaced_items
     def find_position(self, orientation, packed_items):
         item_width, item_length, item_height = orientation
         
@@ -104,6 +34,12 @@ class PackingAlgorithm:
         return self.find_position_in_section(orientation, packed_items, self.large_section_width, self.width)
 
     def find_position_in_section(self, orientation, packed_items, start_x, end_x):
+        if self.placement_mode == 'extreme_points':
+            return self.find_extreme_point_in_section(orientation, packed_items, start_x, end_x)
+        if self.placement_mode == 'height_map':
+            return self.find_surface_position_in_section(orientation, start_x, end_x,
+                                                         range(self.length - orientation[1], -1, -1))
+
         item_width, item_length, item_height = orientation
         best_position = None
 
@@ -116,46 +52,54 @@ class PackingAlgorithm:
                             best_position = position
 
         return best_position
-    def is_better_position(self, new_pos, current_best):
-        if not current_best:
-            return True
-        # Prioritize: 1. Back (higher y), 2. Bottom (lower z), 3. Left (lower x)
-        if new_pos[1] > current_best[1]:
-            return True
-        elif new_pos[1] == current_best[1]:
-            if new_pos[2] < current_best[2]:
-                return True
-            elif new_pos[2] == current_best[2]:
-                return new_pos[0] < current_best[0]
-        return False
-    
-    
-    def can_place_item(self, x, y, z, orientation, packed_items):
+
+    def find_extreme_point_in_section(self, orientation, packed_items, start_x, end_x):
         item_width, item_length, item_height = orientation
+        max_x = min(end_x, self.width) - item_width
+        best_position = None
+
+        # Extreme points are (x, back face y, z): the item is placed with its back face on that y
+        for x, back_y, z in self.generate_extreme_points(packed_items, start_x):
+            y = back_y - item_length
+            if x < start_x or x > max_x or y < 0:
+                continue
+            position = (x, y, z)
+            if best_position and not self.is_better_position(position, best_position):
+                continue
+            if self.can_place_item(x, y, z, orientation, packed_items):
+                best_position = position
+
+        return best_position
+
+    def generate_extreme_points(self, packed_items, start_x):
+        # Back-left-bottom corner of the section
+        points = {(start_x, self.length, 0)}
 
-        # 컨테이너 크기 체크
-        if (x + item_width > self.width or
-            y + item_length > self.length or
-            z + item_height > self.height):
-            return False
-        
-        # 다른 아이템과의 겹침 체크
         for packed_item in packed_items:
             px, py, pz = packed_item['position']
             po = packed_item['orientation']
-            if not (x + item_width <= px or x >= px + po[0] or
-                    y + item_length <= py or y >= py + po[1] or
-                    z + item_height <= pz or z >= pz + po[2]):
-                return False
-
-        # 바닥에 있거나 충분히 지지되는지 확인
-        if z == 0:
-            return True
-        else:
-            supported_area = self.calculate_support_area(x, y, z, orientation, packed_items)
-            return supported_area / (item_width * item_length) >= 0.8
+            corners = [
+                (px + po[0], py + po[1], pz),  # 오른쪽
+                (px, py, pz),                  # 앞쪽
+                (px, py + po[1], pz + po[2])   # 위쪽
+            ]
+            for x, back_y, z in corners:
+                points.add((x, back_y, z))
+                # Project onto the section's left wall and the container's back wall
+                points.add((start_x, back_y, z))
+                points.add((x, self.length, z))
+
+        return points
+
+    def position_key(self, position):
+        # Prioritize: 1. Back (higher y), 2. Bottom (lower z), 3. Left (lower x)
+        return (-position[1], position[2], position[0])
 
-        return True
+    def new_surface_z(self, position, orientation):
+        # Extreme points also appear beside the new box, at its bottom z
+        if self.placement_mode == 'extreme_points':
+            return position[2]
+        return position[2] + orientation[2]
 
     def calculate_contact_area(self, x, y, z, orientation, packed_items):
         item_width, item_length, item_height = orientation
@@ -203,35 +147,16 @@ class PackingAlgorithm:
                     contact_area += min(item_width, po[0]) * min(item_length, po[1])
 
         return contact_area
-    def calculate_support_area(self, x, y, z, orientation, packed_items):
-        item_width, item_length, item_height = orientation
-        support_area = 0
-
-        for packed_item in packed_items:
-            px, py, pz = packed_item['position']
-            po = packed_item['orientation']
-            if z == pz + po[2]:  # 아이템이 바로 아래에 있는 경우
-                overlap_x = max(0, min(x + item_width, px + po[0]) - max(x, px))
-                overlap_y = max(0, min(y + item_length, py + po[1]) - max(y, py))
-                support_area += overlap_x * overlap_y
-
-        return support_area
-
-
-    def calculate_capacity_utilization(self, packed_items):
-        total_volume = sum(item['orientation'][0] * item['orientation'][1] * item['orientation'][2] for item in packed_items)
-        container_volume = self.width * self.length * self.height
-        return total_volume / container_volume
 
-def pack_items(scenario_number):
+def pack_items(scenario_number, placement_mode='grid'):
     # create_scenario 함수를 사용하여 컨테이너 크기와 아이템 데이터를 가져옵니다
     container_size, items_data = create_scenario(scenario_number)
 
-    # 아이템 데이터를 Item 객체로 변환합니다
-    items = [Item(int(key), value['width'], value['length'], value['height'], value['weight'], value['location'])
-             for key, value in items_data.items()]
+    # 아이템 데이터를 Item 객체로 변환합니다 (스펙별 회전은 카탈로그에서 한 번만 계산)
+    catalog = ItemCatalog(items_data)
+    items = catalog.build_items(Item, container_size)
 
-    container = PackingAlgorithm(container_size[0], container_size[1], container_size[2])
+    container = PackingAlgorithm(container_size[0], container_size[1], container_size[2], placement_mode)
     container.pack_items_with_permutations(items)
     
     print("Best Packed Items:")
@@ -0,0 +1,87 @@
+# Rotations as index permutations of (width, length, height), in the order the engines try them
+UPRIGHT_ROTATIONS = ((0, 1, 2), (0, 2, 1), (1, 0, 2))
+ALL_ROTATIONS = ((0, 1, 2), (0, 2, 1), (1, 0, 2), (1, 2, 0), (2, 0, 1), (2, 1, 0))
+
+
+def unique_orientations(dimensions, rotations=UPRIGHT_ROTATIONS):
+    # Cube-like boxes give the same tuple for several rotations; keep the first of each
+    return tuple(dict.fromkeys(tuple(dimensions[i] for i in rotation) for rotation in rotations))
+
+
+class Item:
+    rotations = UPRIGHT_ROTATIONS
+
+    def __init__(self, id, width, length, height, weight, location, orientations=None):
+        self.id = id
+        self.width = int(width)
+        self.length = int(length)
+        self.height = int(height)
+        self.weight = weight
+        self.location = location
+        self.volume = self.width * self.length * self.height
+        # Precomputed by ItemCatalog; computed on demand for items built without one
+        self.orientations = orientations
+
+    def possible_orientations(self):
+        if self.orientations is None:
+            self.orientations = unique_orientations((self.width, self.length, self.height), self.rotations)
+        return self.orientations
+
+
+class ItemSpec:
+    def __init__(self, spec_id, width, length, height):
+        self.spec_id = spec_id
+        self.dimensions = (int(width), int(length), int(height))
+        self.volume = self.dimensions[0] * self.dimensions[1] * self.dimensions[2]
+        self._orientations = {}
+        self._fit_masks = {}
+
+    def orientations(self, rotations=UPRIGHT_ROTATIONS):
+        if rotations not in self._orientations:
+            self._orientations[rotations] = unique_orientations(self.dimensions, rotations)
+        return self._orientations[rotations]
+
+    def fit_mask(self, container_size, rotations=UPRIGHT_ROTATIONS):
+        # True for every orientation that fits in an empty container
+        key = (tuple(int(s) for s in container_size), rotations)
+        if key not in self._fit_masks:
+            self._fit_masks[key] = tuple(all(d <= s for d, s in zip(orientation, key[0]))
+                                         for orientation in self.orientations(rotations))
+        return self._fit_masks[key]
+
+    def fitting_orientations(self, container_size, rotations=UPRIGHT_ROTATIONS):
+        return tuple(orientation for orientation, fits in
+                     zip(self.orientations(rotations), self.fit_mask(container_size, rotations)) if fits)
+
+
+class ItemCatalog:
+    # Per-spec geometry computed once per scenario and shared by every packing engine
+    def __init__(self, items_data):
+        self.specs = {}
+        self.item_specs = {}
+        for key, value in items_data.items():
+            spec = ItemSpec(value.get('spec_id'), value['width'], value['length'], value['height'])
+            spec_key = spec.spec_id if spec.spec_id is not None else spec.dimensions
+            known = self.specs.setdefault(spec_key, spec)
+            if known.dimensions != spec.dimensions:
+                raise ValueError(f"spec_id {spec_key} has dimensions {known.dimensions} and {spec.dimensions}")
+            self.item_specs[key] = known
+        self.items_data = items_data
+
+    def spec(self, key):
+        return self.item_specs[key]
+
+    def build_items(self, item_class=Item, container_size=None, rotations=None):
+        # Item objects whose possible_orientations() read the precomputed tuples
+        if rotations is None:
+            rotations = item_class.rotations
+        items = []
+        for key, value in self.items_data.items():
+            spec = self.item_specs[key]
+            if container_size is None:
+                orientations = spec.orientations(rotations)
+            else:
+                orientations = spec.fitting_orientations(container_size, rotations)
+            items.append(item_class(int(key), value['width'], value['length'], value['height'],
+                                    value['weight'], value['location'], orientations=orientations))
+        return items
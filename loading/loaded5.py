@@ -2,6 +2,7 @@ import matplotlib.pyplot as plt
 from mpl_toolkits.mplot3d.art3d import Poly3DCollection
 import numpy as np
 import matplotlib.animation as animation
+from voxel_kernels import build_prefix_sum, best_contact_position
 import random
 
 # 컨테이너의 크기
@@ -94,23 +95,39 @@ def count_adjacent_faces(container, position, size):
         faces += dx * dy
     return faces
 
-def find_best_fit(container, size):
+def scan_positions(container, size):
+    for y in range(container.shape[1]):
+        for x in range(container.shape[0]):
+            for z in range(container.shape[2]):
+                position = np.array([x, y, z])
+                if can_place(container, position, size):
+                    yield position
+
+def find_best_fit(container, size, feasibility_mode='prefix_sum'):
     best_position = None
     best_rotation = None
     max_adjacent_faces = -1
 
+    # 'prefix_sum': 배치마다 누적합 테이블을 한 번 만들고 모든 위치를 한꺼번에 검사, 'scan': 위치별 검사
+    if feasibility_mode == 'prefix_sum':
+        prefix = build_prefix_sum(container)
+
     for rotation in range(6):
         rotated_size = rotate_size(size, rotation)
-        for y in range(container.shape[1]):
-            for x in range(container.shape[0]):
-                for z in range(container.shape[2]):
-                    position = np.array([x, y, z])
-                    if can_place(container, position, rotated_size):
-                        adjacent_faces = count_adjacent_faces(container, position, rotated_size)
-                        if adjacent_faces > max_adjacent_faces:
-                            best_position = position
-                            best_rotation = rotation
-                            max_adjacent_faces = adjacent_faces
+        if feasibility_mode == 'prefix_sum':
+            # 모든 가능한 위치의 접촉 점수를 한 번에 계산해 argmax로 고름
+            position, adjacent_faces = best_contact_position(prefix, rotated_size)
+            if position is not None and adjacent_faces > max_adjacent_faces:
+                best_position = position
+                best_rotation = rotation
+                max_adjacent_faces = adjacent_faces
+            continue
+        for position in scan_positions(container, rotated_size):
+            adjacent_faces = count_adjacent_faces(container, position, rotated_size)
+            if adjacent_faces > max_adjacent_faces:
+                best_position = position
+                best_rotation = rotation
+                max_adjacent_faces = adjacent_faces
 
     return best_position, best_rotation
 
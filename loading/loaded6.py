@@ -2,6 +2,7 @@ import matplotlib.pyplot as plt
 from mpl_toolkits.mplot3d.art3d import Poly3DCollection
 import numpy as np
 import matplotlib.animation as animation
+from voxel_kernels import OccupancyGrid, best_contact_position
 import json
 
 # 컨테이너의 크기
@@ -58,59 +59,70 @@ sorted_box_specs = sorted(expanded_box_specs, key=lambda x: (x[5], -x[0]*x[1]*x[
 # 적재될 박스들의 위치와 크기 리스트
 boxes_to_load = []
 
-# 컨테이너를 3D 배열로 초기화 (0: 빈 공간, 1: 차지한 공간)
-container = np.zeros(container_size)
+# 컨테이너를 점유 격자로 초기화 (False: 빈 공간, True: 차지한 공간)
+container = OccupancyGrid(container_size)
 
 # 빈 공간 계산을 위한 변수
 occupied_volume = 0
 
 def can_place(container, position, size):
-    x, y, z = position
-    dx, dy, dz = size
-    if x + dx > container.shape[0] or y + dy > container.shape[1] or z + dz > container.shape[2]:
-        return False
-    return np.all(container[x:x+dx, y:y+dy, z:z+dz] == 0)
+    return container.test(position, size)
 
 def place_box(container, position, size):
-    x, y, z = position
-    dx, dy, dz = size
-    container[x:x+dx, y:y+dy, z:z+dz] = 1
+    container.place(position, size)
 
 def count_adjacent_faces(container, position, size):
     x, y, z = position
     dx, dy, dz = size
+    cells = container.cells
     faces = 0
-    if x > 0 and np.all(container[x-1:x, y:y+dy, z:z+dz] == 1):
+    if x > 0 and cells[x-1, y:y+dy, z:z+dz].all():
         faces += dy * dz
-    if x + dx < container.shape[0] and np.all(container[x+dx:x+dx+1, y:y+dy, z:z+dz] == 1):
+    if x + dx < cells.shape[0] and cells[x+dx, y:y+dy, z:z+dz].all():
         faces += dy * dz
-    if y > 0 and np.all(container[x:x+dx, y-1:y, z:z+dz] == 1):
+    if y > 0 and cells[x:x+dx, y-1, z:z+dz].all():
         faces += dx * dz
-    if y + dy < container.shape[1] and np.all(container[x:x+dx, y+dy:y+dy+1, z:z+dz] == 1):
+    if y + dy < cells.shape[1] and cells[x:x+dx, y+dy, z:z+dz].all():
         faces += dx * dz
-    if z > 0 and np.all(container[x:x+dx, y:y+dy, z-1:z] == 1):
+    if z > 0 and cells[x:x+dx, y:y+dy, z-1].all():
         faces += dx * dy
-    if z + dz < container.shape[2] and np.all(container[x:x+dx, y:y+dy, z+dz:z+dz+1] == 1):
+    if z + dz < cells.shape[2] and cells[x:x+dx, y:y+dy, z+dz].all():
         faces += dx * dy
     return faces
 
-def find_best_fit(container, size):
+def scan_positions(container, size):
+    for y in range(container.shape[1]):
+        for x in range(container.shape[0]):
+            for z in range(container.shape[2]):
+                position = np.array([x, y, z])
+                if can_place(container, position, size):
+                    yield position
+
+def find_best_fit(container, size, feasibility_mode='prefix_sum'):
     best_position = None
     best_rotation = None
     max_adjacent_faces = -1
 
+    # 'prefix_sum': 배치마다 누적합 테이블을 한 번 만들고 모든 위치를 한꺼번에 검사, 'scan': 위치별 검사
+    if feasibility_mode == 'prefix_sum':
+        prefix = container.prefix_sum()
+
     for rotation in range(6):
         rotated_size = rotate_size(size, rotation)
-        for y in range(container.shape[1]):
-            for x in range(container.shape[0]):
-                for z in range(container.shape[2]):
-                    position = np.array([x, y, z])
-                    if can_place(container, position, rotated_size):
-                        adjacent_faces = count_adjacent_faces(container, position, rotated_size)
-                        if adjacent_faces > max_adjacent_faces:
-                            best_position = position
-                            best_rotation = rotation
-                            max_adjacent_faces = adjacent_faces
+        if feasibility_mode == 'prefix_sum':
+            # 모든 가능한 위치의 접촉 점수를 한 번에 계산해 argmax로 고름
+            position, adjacent_faces = best_contact_position(prefix, rotated_size)
+            if position is not None and adjacent_faces > max_adjacent_faces:
+                best_position = position
+                best_rotation = rotation
+                max_adjacent_faces = adjacent_faces
+            continue
+        for position in scan_positions(container, rotated_size):
+            adjacent_faces = count_adjacent_faces(container, position, rotated_size)
+            if adjacent_faces > max_adjacent_faces:
+                best_position = position
+                best_rotation = rotation
+                max_adjacent_faces = adjacent_faces
 
     return best_position, best_rotation
 
@@ -118,9 +130,9 @@ def find_best_fit(container, size):
 empty_percentages = []
 
 for _ in range(5):
-    # 각 시뮬레이션마다 초기화
+    # 각 시뮬레이션마다 초기화 (격자는 새로 만들지 않고 비움)
     boxes_to_load = []
-    container = np.zeros(container_size)
+    container.clear()
     occupied_volume = 0
 
     for spec in sorted_box_specs:
@@ -0,0 +1,102 @@
+import numpy as np
+
+# 점유 격자의 3D 누적합(summed-area table)으로 모든 위치의 적재 가능 여부를 한 번에 계산
+
+
+def build_prefix_sum(container):
+    # prefix[i, j, k] = number of occupied voxels in container[:i, :j, :k]
+    prefix = np.zeros(tuple(s + 1 for s in container.shape), dtype=np.int32)
+    prefix[1:, 1:, 1:] = (container != 0).cumsum(axis=0, dtype=np.int32).cumsum(axis=1).cumsum(axis=2)
+    return prefix
+
+
+def box_sums(prefix, size):
+    # Occupied voxel count of a dx x dy x dz box anchored at every (x, y, z) that fits in the container
+    dx, dy, dz = (int(s) for s in size)
+    nx, ny, nz = (prefix.shape[0] - dx, prefix.shape[1] - dy, prefix.shape[2] - dz)
+    if nx <= 0 or ny <= 0 or nz <= 0:
+        return np.zeros((max(nx, 0), max(ny, 0), max(nz, 0)), dtype=np.int32)
+    x0, x1 = slice(0, nx), slice(dx, dx + nx)
+    y0, y1 = slice(0, ny), slice(dy, dy + ny)
+    z0, z1 = slice(0, nz), slice(dz, dz + nz)
+    return (prefix[x1, y1, z1] - prefix[x0, y1, z1] - prefix[x1, y0, z1] - prefix[x1, y1, z0]
+            + prefix[x0, y0, z1] + prefix[x0, y1, z0] + prefix[x1, y0, z0] - prefix[x0, y0, z0])
+
+
+def feasible_anchors(prefix, size):
+    # Boolean mask over anchors: True where the box lies inside the container on empty voxels only
+    return box_sums(prefix, size) == 0
+
+
+def feasible_positions(prefix, size):
+    # (x, y, z) rows of the feasible anchors in the y, x, z scan order of find_best_fit
+    yxz = np.argwhere(feasible_anchors(prefix, size).transpose(1, 0, 2))
+    return yxz[:, [1, 0, 2]]
+
+
+def contact_scores(prefix, size):
+    # count_adjacent_faces for every anchor: a face scores its area when the plane next to it is fully occupied
+    size = tuple(int(s) for s in size)
+    anchor_shape = tuple(prefix.shape[axis] - size[axis] for axis in range(3))
+    if min(anchor_shape) <= 0:
+        return np.zeros(tuple(max(n, 0) for n in anchor_shape), dtype=np.int64)
+
+    scores = np.zeros(anchor_shape, dtype=np.int64)
+    for axis in range(3):
+        plane_size = list(size)
+        plane_size[axis] = 1
+        area = int(np.prod(plane_size))
+        full = box_sums(prefix, plane_size) == area
+        n = anchor_shape[axis]
+        target = [slice(None)] * 3
+        source = [slice(None)] * 3
+        # Plane just before the box (a - 1), then just after it (a + size)
+        target[axis], source[axis] = slice(1, n), slice(0, n - 1)
+        scores[tuple(target)] += full[tuple(source)] * area
+        target[axis], source[axis] = slice(0, n - 1), slice(size[axis], size[axis] + n - 1)
+        scores[tuple(target)] += full[tuple(source)] * area
+    return scores
+
+
+def best_contact_position(prefix, size):
+    # Feasible anchor with the highest contact score, first in y, x, z order on ties; (None, -1) if none
+    scores = np.where(feasible_anchors(prefix, size), contact_scores(prefix, size), -1).transpose(1, 0, 2)
+    if scores.size == 0:
+        return None, -1
+    y, x, z = np.unravel_index(np.argmax(scores), scores.shape)
+    best_score = int(scores[y, x, z])
+    if best_score < 0:
+        return None, -1
+    return np.array([x, y, z]), best_score
+
+
+class OccupancyGrid:
+    # 1 byte per voxel instead of a float64 grid (8x smaller); True marks an occupied voxel
+    def __init__(self, shape):
+        self.cells = np.zeros(tuple(int(s) for s in shape), dtype=bool)
+
+    @property
+    def shape(self):
+        return self.cells.shape
+
+    def fits(self, position, size):
+        return all(p >= 0 and p + s <= limit for p, s, limit in zip(position, size, self.shape))
+
+    def test(self, position, size):
+        # True when the box is inside the container and every voxel it covers is empty
+        if not self.fits(position, size):
+            return False
+        x, y, z = position
+        dx, dy, dz = size
+        return not self.cells[x:x+dx, y:y+dy, z:z+dz].any()
+
+    def place(self, position, size):
+        x, y, z = position
+        dx, dy, dz = size
+        self.cells[x:x+dx, y:y+dy, z:z+dz] = True
+
+    def clear(self):
+        self.cells.fill(False)
+
+    def prefix_sum(self):
+        return build_prefix_sum(self.cells)
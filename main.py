@@ -1,28 +1,39 @@
 import json
 import os
 import sys
-from main_data import create_scenario
+import time
+from concurrent.futures import ProcessPoolExecutor
+from main_data import create_scenario, load_scenario
+from item_catalog import ItemCatalog
 from rearrange_order import rearrange_order
-from unload import process_unloading
+from unload import unload_items
 import generate_barcodes as gb
-from heuristics import PackingAlgorithm as OriginalPackingAlgorithm, Item as OriginalItem
-from subvolume import PackingAlgorithm as SubvolumePackingAlgorithm, Item as SubvolumeItem
+from engines import create_engine
+from result_cache import ResultCache, PACKING_CODE, REARRANGE_CODE
+
+def add_mapping_ids(rearranged_items, original_data):
+    # Add mapping_id to rearranged items
+    for item in rearranged_items:
+        item_id = str(item['id'])
+        if item_id in original_data and 'mapping_id' in original_data[item_id]:
+            item['mapping_id'] = original_data[item_id]['mapping_id']
+    return rearranged_items
+
+
+def load_mapping_data(scenario_number):
+    # The original data with mapping_id is the scenario's box data, already cached by load_scenario
+    return load_scenario(scenario_number)[1]
+
 
 def add_mapping_id_to_rearranged_items(scenario_number, packing_method):
-    # Load the original data with mapping_id
-    with open(f'./main_box_scenario_{scenario_number}.json', 'r') as f:
-        original_data = json.load(f)
+    original_data = load_mapping_data(scenario_number)
 
     # Load the rearranged items data
     rearranged_items_file = f'./scenario/rearranged_items_scenario_{scenario_number}_{packing_method}.json'
     with open(rearranged_items_file, 'r') as f:
         rearranged_items = json.load(f)
 
-    # Add mapping_id to rearranged items
-    for item in rearranged_items:
-        item_id = str(item['id'])
-        if item_id in original_data and 'mapping_id' in original_data[item_id]:
-            item['mapping_id'] = original_data[item_id]['mapping_id']
+    add_mapping_ids(rearranged_items, original_data)
 
     # Save the updated rearranged items data
     with open(rearranged_items_file, 'w') as f:
@@ -31,51 +42,23 @@ def add_mapping_id_to_rearranged_items(scenario_number, packing_method):
     print(f"매핑 ID가 {rearranged_items_file}에 추가되었습니다.")
 
 
-def main():
-    scenario_number = input("시나리오 번호를 입력하세요: ")
+# 엔진 이름별 출력 라벨과 결과 파일
+PACKING_METHODS = {
+    "original": {
+        "label": "Original Heuristic",
+        "packed_file": "./scenario/packed_items_scenario_{}_original.json",
+        "unplaced_file": None
+    },
+    "subvolume": {
+        "label": "Subvolume Heuristic",
+        "packed_file": "./scenario/subvolume_packed_items_scenario_{}.json",
+        "unplaced_file": "./scenario/subvolume_unplaced_items_scenario_{}.json"
+    }
+}
 
-    # . 메인 시나리오 생성
-    container_size, items = create_scenario(scenario_number)
 
-    # 3. 기존 heuristic을 사용한 아이템 패킹
-    original_container = OriginalPackingAlgorithm(container_size[0], container_size[1], container_size[2])
-    original_item_objects = [OriginalItem(int(key), value['width'], value['length'], value['height'], value['weight'], value['location'])
-                    for key, value in items.items()]
-    original_container.pack_items_with_permutations(original_item_objects)
-
-    # 기존 heuristic 결과 저장
-    with open(f'./scenario/packed_items_scenario_{scenario_number}_original.json', 'w') as f:
-        json.dump(original_container.best_packed_items, f, indent=4)
-
-    print(f"Original Heuristic - Best Capacity Utilization: {original_container.best_utilization:.2%}")
-
-    # 기존 heuristic 적재 순서 재배열
-    original_rearranged_items = rearrange_order(original_container.best_packed_items, container_size[0], container_size[1], container_size[2])
-    original_rearranged_items_file = f'./scenario/rearranged_items_scenario_{scenario_number}_original.json'
-    with open(original_rearranged_items_file, 'w') as f:
-        json.dump(original_rearranged_items, f, indent=4)
-
-    add_mapping_id_to_rearranged_items(scenario_number, "original")
-
-    # 기존 heuristic 언로딩 시뮬레이션
-    original_unloading_result = process_unloading(scenario_number, "original")
-    if original_unloading_result:
-        print("Original Heuristic Unloading Results:")
-        print(f"Total operations: {original_unloading_result['total_operations']}")
-        print(f"Unloading cost: {original_unloading_result['unloading_cost']}")
-        print(f"Reloading count: {original_unloading_result['reloading_count']}")
-
-    # 4. Subvolume 기법을 사용한 아이템 패킹
-    subvolume_container = SubvolumePackingAlgorithm(container_size[0], container_size[1], container_size[2])
-    subvolume_item_objects = [SubvolumeItem(int(key), value['width'], value['length'], value['height'], value['weight'], value['location'])
-                    for key, value in items.items()]
-    subvolume_container.pack_items_with_permutations(subvolume_item_objects)
-
-    # Subvolume 결과 저장
-    with open(f'./scenario/subvolume_packed_items_scenario_{scenario_number}.json', 'w') as f:
-        json.dump(subvolume_container.best_packed_items, f, indent=4)
-
-    unplaced_items_data = [
+def unplaced_items_data(unplaced_items):
+    return [
         {
             "id": item.id,
             "width": item.width,
@@ -84,31 +67,178 @@ def main():
             "weight": item.weight,
             "location": item.location
         }
-        for item in subvolume_container.best_unplaced_items
+        for item in unplaced_items
     ]
-    with open(f'./scenario/subvolume_unplaced_items_scenario_{scenario_number}.json', 'w') as f:
-        json.dump(unplaced_items_data, f, indent=4)
 
-    print(f"Subvolume Heuristic - Best Capacity Utilization: {subvolume_container.best_utilization:.2%}")
 
-    # Subvolume 적재 순서 재배열
-    subvolume_rearranged_items = rearrange_order(subvolume_container.best_packed_items, container_size[0], container_size[1], container_size[2])
-    subvolume_rearranged_items_file = f'./scenario/rearranged_items_scenario_{scenario_number}_subvolume.json'
-    with open(subvolume_rearranged_items_file, 'w') as f:
-        json.dump(subvolume_rearranged_items, f, indent=4)
+# engine_options keys that go to pack() instead of the engine constructor (e.g. placement_mode)
+PACK_OPTIONS = ('num_iterations', 'seeds', 'processes')
+
+
+def pack_scenario(packing_method, container_size, catalog, cache=None, engine_options=None):
+    # 패킹 결과; cache가 있으면 (시나리오 내용, 엔진, 파라미터, 코드 버전)이 같은 이전 결과를 재사용
+    engine_options = dict(engine_options or {})
+    pack_options = {name: engine_options.pop(name) for name in PACK_OPTIONS if name in engine_options}
+
+    key = None
+    if cache is not None:
+        # processes only changes how the multi-start runs are scheduled, not their result
+        params = {"container_size": container_size, **engine_options,
+                  **{name: value for name, value in pack_options.items() if name != 'processes'}}
+        key = cache.key("pack", PACKING_CODE, scenario=list(catalog.items_data.items()), engine=packing_method,
+                        params=params)
+        result = cache.get(key)
+        if result is not None:
+            return result, key
+
+    container = create_engine(packing_method, container_size, **engine_options)
+    container.pack(catalog.build_items(container.item_class, container_size), **pack_options)
+    result = {
+        "packed_items": container.best_packed_items,
+        "unplaced_items": unplaced_items_data(container.best_unplaced_items),
+        "utilization": container.best_utilization
+    }
+    if cache is not None:
+        cache.put(key, result)
+    return result, key
+
+
+def rearrange_packing(packed_items, container_size, cache=None, pack_key=None):
+    # rearrange_order updates load_order in place, so it works on copies and packed_items keeps the packing order
+    key = None
+    if cache is not None and pack_key is not None:
+        key = cache.key("rearrange", REARRANGE_CODE, packing=pack_key, container_size=container_size)
+        rearranged_items = cache.get(key)
+        if rearranged_items is not None:
+            return rearranged_items
+
+    rearranged_items = rearrange_order([dict(item) for item in packed_items],
+                                       container_size[0], container_size[1], container_size[2])
+    if key is not None:
+        cache.put(key, rearranged_items)
+    return rearranged_items
+
+
+def run_pipeline(packing_method, container_size, catalog, mapping_data=None, cache=None, engine_options=None):
+    # 패킹 -> 재배열 -> 언로딩을 메모리 안에서 이어서 실행하고 결과 plan을 반환 (파일 저장은 save_plan)
+    packing, pack_key = pack_scenario(packing_method, container_size, catalog, cache, engine_options)
+    rearranged_items = rearrange_packing(packing["packed_items"], container_size, cache, pack_key)
+    if mapping_data is not None:
+        add_mapping_ids(rearranged_items, mapping_data)
+
+    total_operations, unloading_cost, reloading_count, operations_log = unload_items(rearranged_items, container_size)
+    return {
+        "packed_items": packing["packed_items"],
+        "unplaced_items": packing["unplaced_items"],
+        "utilization": packing["utilization"],
+        "rearranged_items": rearranged_items,
+        "operations_log": operations_log,
+        "unloading_result": {
+            "total_operations": total_operations,
+            "unloading_cost": unloading_cost,
+            "reloading_count": reloading_count
+        }
+    }
+
+
+def save_plan(scenario_number, packing_method, plan):
+    # 파이프라인 결과를 기존과 같은 파일들로 저장
+    settings = PACKING_METHODS[packing_method]
+    with open(settings["packed_file"].format(scenario_number), 'w') as f:
+        json.dump(plan["packed_items"], f, indent=4)
 
-    add_mapping_id_to_rearranged_items(scenario_number, "subvolume")
+    if settings["unplaced_file"]:
+        with open(settings["unplaced_file"].format(scenario_number), 'w') as f:
+            json.dump(plan["unplaced_items"], f, indent=4)
 
-    # Subvolume 언로딩 시뮬레이션
-    subvolume_unloading_result = process_unloading(scenario_number, "subvolume")
-    if subvolume_unloading_result:
-        print("Subvolume Heuristic Unloading Results:")
-        print(f"Total operations: {subvolume_unloading_result['total_operations']}")
-        print(f"Unloading cost: {subvolume_unloading_result['unloading_cost']}")
-        print(f"Reloading count: {subvolume_unloading_result['reloading_count']}")
+    rearranged_items_file = f'./scenario/rearranged_items_scenario_{scenario_number}_{packing_method}.json'
+    with open(rearranged_items_file, 'w') as f:
+        json.dump(plan["rearranged_items"], f, indent=4)
+
+    result_file = f'./scenario/unloading_operations_scenario_{scenario_number}_{packing_method}.json'
+    with open(result_file, 'w') as f:
+        json.dump(plan["operations_log"], f, indent=4)
+    print(f"언로딩 작업 결과가 '{result_file}'에 저장되었습니다.")
+
+
+def run_packing_method(scenario_number, packing_method, container_size, catalog, mapping_data=None, save=True,
+                       cache=None, engine_options=None):
+    label = PACKING_METHODS[packing_method]["label"]
+    plan = run_pipeline(packing_method, container_size, catalog, mapping_data, cache, engine_options)
+    print(f"{label} - Best Capacity Utilization: {plan['utilization']:.2%}")
+
+    if save:
+        save_plan(scenario_number, packing_method, plan)
+
+    unloading_result = plan["unloading_result"]
+    print(f"{label} Unloading Results:")
+    print(f"Total operations: {unloading_result['total_operations']}")
+    print(f"Unloading cost: {unloading_result['unloading_cost']}")
+    print(f"Reloading count: {unloading_result['reloading_count']}")
+
+    return unloading_result
+
+
+def pipeline_summary(scenario_number, packing_method, container_size, catalog, mapping_data=None, save=True,
+                     cache=None, engine_options=None):
+    # 한 엔진의 파이프라인을 실행하고 비교 보고서용 요약만 반환 (프로세스 간에 plan 전체를 넘기지 않음)
+    start = time.perf_counter()
+    plan = run_pipeline(packing_method, container_size, catalog, mapping_data, cache, engine_options)
+    if save:
+        save_plan(scenario_number, packing_method, plan)
+    return {
+        "method": packing_method,
+        "label": PACKING_METHODS[packing_method]["label"],
+        "utilization": plan["utilization"],
+        "packed_count": len(plan["packed_items"]),
+        "unplaced_count": len(plan["unplaced_items"]),
+        **plan["unloading_result"],
+        "runtime": time.perf_counter() - start
+    }
+
+
+def run_pipelines_concurrently(scenario_number, container_size, catalog, mapping_data=None, packing_methods=None,
+                               processes=None, save=True, cache=None, engine_options=None):
+    # 엔진마다 별도 프로세스에서 실행하므로 전체 시간은 가장 느린 엔진의 시간과 같음
+    if packing_methods is None:
+        packing_methods = list(PACKING_METHODS)
+    with ProcessPoolExecutor(max_workers=processes or len(packing_methods)) as executor:
+        futures = [executor.submit(pipeline_summary, scenario_number, packing_method, container_size, catalog,
+                                   mapping_data, save, cache, engine_options)
+                   for packing_method in packing_methods]
+        return [future.result() for future in futures]
+
+
+def print_comparison_report(summaries):
+    print(f"{'Method':<22}{'Utilization':>12}{'Packed':>8}{'Unplaced':>10}{'Operations':>12}"
+          f"{'Unload cost':>13}{'Reloads':>9}{'Time (s)':>10}")
+    for summary in summaries:
+        print(f"{summary['label']:<22}{summary['utilization']:>12.2%}{summary['packed_count']:>8}"
+              f"{summary['unplaced_count']:>10}{summary['total_operations']:>12}{summary['unloading_cost']:>13.4f}"
+              f"{summary['reloading_count']:>9}{summary['runtime']:>10.1f}")
+
+
+def main(concurrent=False, use_cache=True):
+    scenario_number = input("시나리오 번호를 입력하세요: ")
 
+    # . 메인 시나리오 생성
+    container_size, items = create_scenario(scenario_number)
+    # 스펙별 회전/부피를 한 번만 계산해 두 알고리즘이 공유
+    catalog = ItemCatalog(items)
+    mapping_data = load_mapping_data(scenario_number)
+    # 같은 시나리오/엔진/코드의 패킹과 재배열 결과는 ./.result_cache에서 재사용
+    cache = ResultCache() if use_cache else None
+
+    if concurrent:
+        # 모든 엔진을 동시에 실행하고 결과를 한 표로 비교
+        print_comparison_report(run_pipelines_concurrently(scenario_number, container_size, catalog, mapping_data,
+                                                           cache=cache))
+    else:
+        # 3. 기존 heuristic, 4. Subvolume 기법 순서로 패킹 -> 재배열 -> 언로딩
+        for packing_method in PACKING_METHODS:
+            run_packing_method(scenario_number, packing_method, container_size, catalog, mapping_data, cache=cache)
 
     print("모든 프로세스가 완료되었습니다.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main(concurrent="--concurrent" in sys.argv, use_cache="--no-cache" not in sys.argv)
\ No newline at end of file
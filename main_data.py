@@ -1,20 +1,36 @@
 import json
+import os
 import numpy as np
 
-def create_scenario(scenario_number):
+# 파일 경로별 (mtime, size, 데이터) 캐시
+_scenario_cache = {}
+
+def scenario_container_size():
     # 컨테이너 크기 설정
     container_size = [170, 275, 160]
     container_size = np.array(container_size) * 0.8
-    container_size = container_size.tolist()  # JSON 직렬화를 위해 리스트로 변환
+    return container_size.tolist()  # JSON 직렬화를 위해 리스트로 변환
+
+def load_scenario(scenario_number):
+    # create_scenario without the report and the box_data write-back. The box data is read once per process and
+    # again only when the file's mtime or size changes; the returned dict is shared, so treat it as read-only.
+    filename = f'./main_box_scenario_{scenario_number}.json'
+    stat = os.stat(filename)
+    version = (stat.st_mtime_ns, stat.st_size)
+    cached = _scenario_cache.get(filename)
+    if cached is None or cached[0] != version:
+        with open(filename, 'r') as file:
+            cached = (version, json.load(file))
+        _scenario_cache[filename] = cached
+    return scenario_container_size(), cached[1]
+
+def create_scenario(scenario_number):
+    container_size, data = load_scenario(scenario_number)
     print(f"컨테이너 크기: {container_size}")
 
     # 컨테이너 부피 계산
     container_volume = container_size[0] * container_size[1] * container_size[2]
 
-    # JSON 파일에서 데이터 로드
-    with open(f'./main_box_scenario_{scenario_number}.json', 'r') as file:
-        data = json.load(file)
-
     # 총 아이템 부피 계산
     total_item_volume = sum(item['volume'] for item in data.values())
 
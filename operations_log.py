@@ -0,0 +1,91 @@
+import json
+
+# 하차 작업 로그: 메모리의 중첩 리스트 또는 한 줄에 작업 하나씩 쓰는 JSON Lines 파일
+#   {"step": "Processing location: po1"}
+#   ["U", item_id, unload_order, unloading_time]   Unload / Unload blocking item ("B")
+#   ["T", item_id, unloading_cost]                 Temporarily unload blocking item / Reload ("R")
+# location and position are not repeated per entry; the reader takes them from the packed items.
+
+ACTION_CODES = {
+    "Unload": "U",
+    "Unload blocking item": "B",
+    "Temporarily unload blocking item": "T",
+    "Reload temporarily unloaded item": "R"
+}
+ACTIONS = {code: action for action, code in ACTION_CODES.items()}
+
+
+class OperationsLog:
+    # The nested structure unload_items has always returned
+    def __init__(self):
+        self.operations = []
+
+    def step(self, location):
+        self.operations.append({"step": f"Processing location: {location}", "items": []})
+
+    def add(self, entry):
+        self.operations[-1]["items"].append(entry)
+
+
+class OperationsLogWriter:
+    # Writes each operation as it happens, so nothing is kept in memory
+    operations = None
+
+    def __init__(self, path):
+        self.file = open(path, 'w')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.file.close()
+
+    def write(self, record):
+        self.file.write(json.dumps(record) + "\n")
+
+    def step(self, location):
+        self.write({"step": f"Processing location: {location}"})
+
+    def add(self, entry):
+        code = ACTION_CODES[entry["action"]]
+        if "unload_order" in entry:
+            self.write([code, entry["item_id"], entry["unload_order"], entry["unloading_time"]])
+        else:
+            self.write([code, entry["item_id"], entry["unloading_cost"]])
+
+
+def read_operations_log(path, packed_items):
+    # Rebuild the nested operations list of unload_items from a JSON Lines log
+    items_by_id = {item['id']: item for item in packed_items}
+    operations = []
+    with open(path, 'r') as f:
+        for line in f:
+            record = json.loads(line)
+            if isinstance(record, dict):
+                operations.append({"step": record["step"], "items": []})
+                continue
+            item = items_by_id[record[1]]
+            entry = {
+                "action": ACTIONS[record[0]],
+                "item_id": record[1],
+                "location": item['location'],
+                "position": item['position']
+            }
+            if len(record) == 4:
+                entry["unload_order"] = record[2]
+                entry["unloading_time"] = record[3]
+            else:
+                entry["unloading_cost"] = record[2]
+            operations[-1]["items"].append(entry)
+    return operations
+
+
+def load_operations_log(path, packed_items):
+    # Either log format by file extension
+    if path.endswith('.jsonl'):
+        return read_operations_log(path, packed_items)
+    with open(path, 'r') as f:
+        return json.load(f)
@@ -0,0 +1,149 @@
+from collections import defaultdict
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+# 모든 적재 엔진이 공유하는 기하 커널
+
+def boxes_overlap(x, y, z, orientation, packed_item):
+    w, l, h = orientation
+    px, py, pz = packed_item['position']
+    po = packed_item['orientation']
+    return not (x + w <= px or x >= px + po[0] or
+                y + l <= py or y >= py + po[1] or
+                z + h <= pz or z >= pz + po[2])
+
+
+def overlaps_any(x, y, z, orientation, packed_items):
+    return any(boxes_overlap(x, y, z, orientation, packed_item) for packed_item in packed_items)
+
+
+def support_area(x, y, z, orientation, packed_items):
+    # Base area of a box at z resting on the top faces of the packed items
+    item_width, item_length, _ = orientation
+    area = 0
+    for packed_item in packed_items:
+        px, py, pz = packed_item['position']
+        po = packed_item['orientation']
+        if z == pz + po[2]:  # 아이템이 바로 아래에 있는 경우
+            overlap_x = max(0, min(x + item_width, px + po[0]) - max(x, px))
+            overlap_y = max(0, min(y + item_length, py + po[1]) - max(y, py))
+            area += overlap_x * overlap_y
+    return area
+
+
+def capacity_utilization(packed_items, width, length, height):
+    total_volume = sum(item['orientation'][0] * item['orientation'][1] * item['orientation'][2] for item in packed_items)
+    return total_volume / (width * length * height)
+
+
+class OverlapIndex:
+    # Uniform 3D bucket grid over the container; each bucket holds the packed items touching it
+    def __init__(self, width, length, height, cell_size=16):
+        self.width = int(width)
+        self.length = int(length)
+        self.height = int(height)
+        self.cell_size = int(cell_size)
+        self.buckets = defaultdict(list)
+        self.items = []
+
+    def clear(self):
+        self.buckets.clear()
+        self.items = []
+
+    def cell_range(self, start, size):
+        return range(start // self.cell_size, (start + size - 1) // self.cell_size + 1)
+
+    def insert(self, packed_item):
+        x, y, z = packed_item['position']
+        w, l, h = packed_item['orientation']
+        index = len(self.items)
+        self.items.append(packed_item)
+        for cx in self.cell_range(x, w):
+            for cy in self.cell_range(y, l):
+                for cz in self.cell_range(z, h):
+                    self.buckets[(cx, cy, cz)].append(index)
+
+    def query(self, x, y, z, w, l, h):
+        # Packed items whose buckets touch the box; may include items that do not overlap it
+        found = set()
+        buckets = self.buckets
+        for cx in self.cell_range(x, w):
+            for cy in self.cell_range(y, l):
+                for cz in self.cell_range(z, h):
+                    bucket = buckets.get((cx, cy, cz))
+                    if bucket:
+                        found.update(bucket)
+        return [self.items[index] for index in found]
+
+    def overlaps(self, x, y, z, orientation):
+        w, l, h = orientation
+        buckets = self.buckets
+        checked = set()
+        for cx in self.cell_range(x, w):
+            for cy in self.cell_range(y, l):
+                for cz in self.cell_range(z, h):
+                    for index in buckets.get((cx, cy, cz), ()):
+                        if index in checked:
+                            continue
+                        checked.add(index)
+                        if boxes_overlap(x, y, z, orientation, self.items[index]):
+                            return True
+        return False
+
+    def items_below(self, x, y, z, w, l):
+        # Packed items whose top face is exactly at z under the footprint candidates
+        if z == 0:
+            return []
+        return [packed_item for packed_item in self.query(x, y, z - 1, w, l, 1)
+                if packed_item['position'][2] + packed_item['orientation'][2] == z]
+
+
+class HeightMap:
+    # Top surface height of the packed boxes for every (x, y) cell of the container floor
+    def __init__(self, width, length):
+        self.heights = np.zeros((int(width), int(length)), dtype=np.int32)
+
+    def place(self, x, y, w, l, top):
+        footprint = self.heights[x:x + w, y:y + l]
+        np.maximum(footprint, top, out=footprint)
+
+    def surface(self, x, y, w, l):
+        # Lowest z at which a w x l footprint can rest
+        return int(self.heights[x:x + w, y:y + l].max())
+
+    def support_area(self, x, y, w, l, z):
+        return int(np.count_nonzero(self.heights[x:x + w, y:y + l] == z))
+
+    def row_placements(self, y, w, l, start_x, end_x):
+        # Resting z and supported area for every x in [start_x, end_x - w] of the row at y
+        strip = self.heights[start_x:end_x, y:y + l]
+        if strip.shape[0] < w:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, empty
+        windows = sliding_window_view(strip, w, axis=0)
+        surfaces = windows.max(axis=(1, 2))
+        support = np.count_nonzero(windows == surfaces[:, None, None], axis=(1, 2))
+        xs = np.arange(start_x, start_x + len(surfaces))
+        return xs, surfaces, support
+
+
+class PlacementFailureCache:
+    # Orientations (w, l, h) that found no position. Free space only shrinks while packing, so an
+    # entry stays valid until a placement adds a surface at new_z that a box of height h could use.
+    def __init__(self, height):
+        self.height = int(height)
+        self.failed = set()
+
+    def __contains__(self, orientation):
+        return orientation in self.failed
+
+    def add(self, orientation):
+        self.failed.add(orientation)
+
+    def placed(self, new_z):
+        self.failed = {orientation for orientation in self.failed if new_z + orientation[2] > self.height}
+
+    def clear(self):
+        # Call whenever space is freed (an item removed from the container)
+        self.failed.clear()
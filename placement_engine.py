@@ -0,0 +1,209 @@
+import random
+from concurrent.futures import ProcessPoolExecutor
+from item_catalog import Item
+from packing_geometry import (OverlapIndex, HeightMap, PlacementFailureCache,
+                              overlaps_any, support_area, capacity_utilization)
+
+
+class PlacementEngine:
+    # Common interface of the packing algorithms:
+    #   pack        -> pack(items) / pack_items_with_permutations(items)
+    #   place       -> find_position(orientation, packed_items)
+    #   feasibility -> can_place_item(x, y, z, orientation, packed_items)
+    #   score       -> position_key(position), lower is better
+    name = None
+    item_class = Item
+    placement_modes = ('grid',)
+    min_support_ratio = 1.0
+
+    def __init__(self, width, length, height, placement_mode='grid'):
+        self.width = int(width)
+        self.length = int(length)
+        self.height = int(height)
+        if placement_mode not in self.placement_modes:
+            raise ValueError(f"Invalid placement mode. Choose one of {', '.join(self.placement_modes)}.")
+        self.placement_mode = placement_mode
+        self.best_packed_items = []
+        self.best_unplaced_items = []
+        self.best_utilization = 0
+        self.overlap_index = None
+        self.height_map = None
+        self.failure_cache = None
+
+    def pack(self, items, **options):
+        self.pack_items_with_permutations(items, **options)
+        return self.best_packed_items, self.best_unplaced_items, self.best_utilization
+
+    def pack_items_with_permutations(self, items, num_iterations=1, seeds=None, processes=None):
+        # Seed 0 is the plain PO/volume order; every other seed perturbs the order inside each PO group
+        if seeds is None:
+            seeds = list(range(num_iterations))
+        orderings = [self.perturb_order(items, seed) for seed in seeds]
+
+        if len(orderings) > 1 and processes != 1:
+            with ProcessPoolExecutor(max_workers=processes) as executor:
+                results = list(executor.map(self.pack_items_by_po, orderings))
+        else:
+            results = [self.pack_items_by_po(ordering) for ordering in orderings]
+
+        for i, (seed, (packed_items, unpacked_items)) in enumerate(zip(seeds, results)):
+            utilization = self.calculate_capacity_utilization(packed_items)
+
+            print(f"Iteration {i+1}/{len(seeds)} (seed {seed}), Utilization: {utilization:.2%}")
+
+            # Strictly better only, so ties keep the earliest seed and results are reproducible
+            if utilization > self.best_utilization:
+                self.best_packed_items = packed_items
+                self.best_unplaced_items = unpacked_items  # Store the best unplaced items
+                self.best_utilization = utilization
+
+    def perturb_order(self, items, seed, strength=0.3):
+        # Sort items by PO number (descending) and then by volume (descending)
+        items_sorted = sorted(items, key=lambda item: (-int(item.location[2:]), -item.volume))
+        if not seed:
+            return items_sorted
+
+        # Scale each volume by a seeded factor so similar-sized items can swap within their PO group
+        rng = random.Random(seed)
+        noise = [rng.uniform(1 - strength, 1) for _ in items_sorted]
+        keyed = sorted(zip(items_sorted, noise), key=lambda pair: (-int(pair[0].location[2:]), -pair[0].volume * pair[1]))
+        return [item for item, _ in keyed]
+
+    def pack_items_by_po(self, sorted_items):
+        return self.with_placement_state(self.pack_sorted_items, sorted_items)
+
+    def with_placement_state(self, pack, sorted_items):
+        # The overlap index, height map and failure cache mirror the packed items only while pack runs;
+        # pack has to report every placement through record_placement
+        self.overlap_index = OverlapIndex(self.width, self.length, self.height)
+        self.failure_cache = PlacementFailureCache(self.height)
+        if self.placement_mode == 'height_map':
+            self.height_map = HeightMap(self.width, self.length)
+        try:
+            return pack(sorted_items)
+        finally:
+            self.overlap_index = None
+            self.height_map = None
+            self.failure_cache = None
+
+    def pack_sorted_items(self, sorted_items):
+        packed_items = []
+        unplaced_items = []
+        load_order = 0
+        current_po = None
+
+        for item in sorted_items:
+            if item.location != current_po:
+                current_po = item.location
+                print(f"Packing items for {current_po}")
+
+            placed = False
+            best_position = None
+            best_orientation = None
+
+            for orientation in item.possible_orientations():
+                if orientation in self.failure_cache:
+                    continue
+                position = self.find_position(orientation, packed_items)
+                if position:
+                    if not best_position or self.is_better_position(position, best_position):
+                        best_position = position
+                        best_orientation = orientation
+                else:
+                    self.failure_cache.add(orientation)
+
+            if best_position:
+                load_order += 1
+                packed_items.append({
+                    "id": item.id,
+                    "position": best_position,
+                    "orientation": best_orientation,
+                    "location": item.location,
+                    "load_order": load_order,
+                    "weight": item.weight
+                })
+                self.record_placement(packed_items[-1])
+                placed = True
+
+            if not placed:
+                print(f"Unable to place item {item.id} from {item.location}")
+                unplaced_items.append(item)
+
+        return packed_items, unplaced_items
+
+    def record_placement(self, packed_item):
+        x, y, z = packed_item['position']
+        w, l, h = packed_item['orientation']
+        self.overlap_index.insert(packed_item)
+        self.failure_cache.placed(self.new_surface_z(packed_item['position'], packed_item['orientation']))
+        if self.height_map is not None:
+            self.height_map.place(x, y, w, l, z + h)
+
+    def new_surface_z(self, position, orientation):
+        # Lowest z at which a placement can create new candidate positions
+        return position[2] + orientation[2]
+
+    def find_position(self, orientation, packed_items):
+        raise NotImplementedError
+
+    def find_surface_position_in_section(self, orientation, start_x, end_x, y_values):
+        item_width, item_length, item_height = orientation
+        base_area = item_width * item_length
+        start_x = max(start_x, 0)
+        end_x = min(end_x, self.width)
+
+        # The only useful z for a footprint is the surface height under it
+        for y in y_values:
+            xs, zs, support = self.height_map.row_placements(y, item_width, item_length, start_x, end_x)
+            if len(xs) == 0:
+                return None
+            feasible = (zs + item_height <= self.height) & ((zs == 0) | self.is_supported(support, base_area))
+            if feasible.any():
+                candidates = [(int(x), y, int(z)) for x, z in zip(xs[feasible], zs[feasible])]
+                return min(candidates, key=self.position_key)
+        return None
+
+    def position_key(self, position):
+        raise NotImplementedError
+
+    def is_better_position(self, new_pos, current_best):
+        if not current_best:
+            return True
+        return self.position_key(new_pos) < self.position_key(current_best)
+
+    def can_place_item(self, x, y, z, orientation, packed_items):
+        item_width, item_length, item_height = orientation
+
+        # Check if the item fits within the container dimensions
+        if (x + item_width > self.width or
+            y + item_length > self.length or
+            z + item_height > self.height):
+            return False
+
+        # Check for overlap with other packed items
+        if self.overlap_index is not None:
+            if self.overlap_index.overlaps(x, y, z, orientation):
+                return False
+        elif overlaps_any(x, y, z, orientation, packed_items):
+            return False
+
+        # On the floor or supported enough by the items below
+        if z == 0:
+            return True
+        return self.is_supported(self.calculate_support_area(x, y, z, orientation, packed_items),
+                                 item_width * item_length)
+
+    def is_supported(self, supported_area, base_area):
+        # Works on scalars and on whole rows of height map candidates
+        return supported_area / base_area >= self.min_support_ratio
+
+    def calculate_support_area(self, x, y, z, orientation, packed_items):
+        item_width, item_length, item_height = orientation
+        if self.height_map is not None:
+            return self.height_map.support_area(x, y, item_width, item_length, z)
+        if self.overlap_index is not None:
+            packed_items = self.overlap_index.items_below(x, y, z, item_width, item_length)
+        return support_area(x, y, z, orientation, packed_items)
+
+    def calculate_capacity_utilization(self, packed_items):
+        return capacity_utilization(packed_items, self.width, self.length, self.height)
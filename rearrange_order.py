@@ -1,8 +1,37 @@
 import json
 import sys
-from main_data import create_scenario
+import numpy as np
+from main_data import load_scenario
+from support_graph import build_support_graph, support_load_order
 
-def rearrange_order(packed_items, container_width, container_length, container_height):
+def small_section_order(ys, zs, container_length, buffer=10):
+    # Load sequence (indices into ys/zs) of the small-section layering: items sorted by (-y, z); each round
+    # takes the first floor item left (or the first item left), grows the layer length to its distance from
+    # the back wall, then takes every item within layer length + buffer, lowest first. The items left are
+    # always a suffix of the sorted order, so each round is one bisect on the sorted distances.
+    ys = np.asarray(ys, dtype=float)
+    zs = np.asarray(zs, dtype=float)
+    order = np.lexsort((zs, -ys))
+    distances = container_length - ys[order]
+    floor = np.flatnonzero(zs[order] == 0)
+
+    sequence = []
+    start = 0
+    layer_length = 0
+    while start < len(order):
+        k = np.searchsorted(floor, start)
+        back = int(floor[k]) if k < len(floor) else start
+        layer_length = max(layer_length, distances[back])
+        end = int(np.searchsorted(distances, layer_length + buffer, side='right'))
+
+        fitting = np.r_[start:back, back + 1:end]
+        fitting = fitting[np.argsort(zs[order[fitting]], kind='stable')]
+        sequence.append(order[back:back + 1])
+        sequence.append(order[fitting])
+        start = end
+    return np.concatenate(sequence) if sequence else np.zeros(0, dtype=np.int64)
+
+def rearrange_order(packed_items, container_width, container_length, container_height, enforce_support=True):
     large_section_width = int(container_width * 0.7)
     large_section = []
     small_section = []
@@ -19,64 +48,33 @@ def rearrange_order(packed_items, container_width, container_length, container_h
     for i, item in enumerate(large_section):
         item['load_order'] = i + 1
     
-    # Sort small section items by position[1] (descending) and position[2] (ascending)
-    small_section.sort(key=lambda x: (-x['position'][1], x['position'][2]))
-    
     # Apply new layering method to small section
-    layers = []
-    current_layer = []
-    current_layer_length = 0
-    buffer = 10  # 10-unit buffer
-    
-    while small_section:
-        # Find the item with the largest position[1] value and smallest position[2]
-        back_item = next((item for item in small_section if item['position'][2] == 0), small_section[0])
-        small_section.remove(back_item)
-        
-        new_layer_length = container_length - back_item['position'][1]
-        if new_layer_length > current_layer_length:
-            if current_layer:
-                layers.append(current_layer)
-            current_layer = [back_item]
-            current_layer_length = new_layer_length
-        else:
-            current_layer.append(back_item)
-        
-        # Stack items in the current layer
-        fitting_items = []
-        i = 0
-        while i < len(small_section):
-            item = small_section[i]
-            item_distance = container_length - item['position'][1]
-            if item_distance <= current_layer_length+buffer:
-                fitting_items.append(item)
-                small_section.pop(i)
-            else:
-                i += 1
-        
-        # Sort fitting items by height (ascending) and add to current layer
-        fitting_items.sort(key=lambda x: x['position'][2])
-        current_layer.extend(fitting_items)
-    
-    # Add the last layer
-    if current_layer:
-        layers.append(current_layer)
+    order = small_section_order([item['position'][1] for item in small_section],
+                                [item['position'][2] for item in small_section], container_length)
+    rearranged_small_section = [small_section[i] for i in order]
+
     # Reassign load orders for small section
     new_load_order = len(large_section) + 1
-    rearranged_small_section = []
-    for layer in layers:
-        for item in layer:
-            item['load_order'] = new_load_order
-            new_load_order += 1
-            rearranged_small_section.append(item)
+    for item in rearranged_small_section:
+        item['load_order'] = new_load_order
+        new_load_order += 1
     
     # Combine and return the rearranged items
-    return large_section + rearranged_small_section
+    rearranged_items = large_section + rearranged_small_section
+    if not enforce_support:
+        return rearranged_items
+
+    # Keep the heuristic order wherever it already loads every box after the boxes it rests on
+    support_graph = build_support_graph(rearranged_items, (container_width, container_length, container_height))
+    rearranged_items = support_load_order(rearranged_items, support_graph)
+    for i, item in enumerate(rearranged_items):
+        item['load_order'] = i + 1
+    return rearranged_items
 
 
 def process_rearrangement(scenario_number, method):
-    # create_scenario 함수를 사용하여 컨테이너 크기와 아이템 데이터를 가져옵니다
-    container_size, _ = create_scenario(scenario_number)
+    # load_scenario 함수를 사용하여 컨테이너 크기를 가져옵니다
+    container_size, _ = load_scenario(scenario_number)
     container_width, container_length, container_height = container_size
 
     # Read the packed items JSON file
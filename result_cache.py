@@ -0,0 +1,99 @@
+import hashlib
+import json
+import os
+import time
+
+# 패킹/재배열 결과를 내용 해시로 저장하는 로컬 캐시 (크기 기준 LRU 삭제)
+
+CACHE_DIR = './.result_cache'
+# A put() writes through <key>.json.<pid>.tmp; older temp files belong to a killed writer
+STALE_TEMP_SECONDS = 300
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Source files whose changes invalidate each cached stage
+PACKING_CODE = ('engines.py', 'placement_engine.py', 'packing_geometry.py', 'item_catalog.py',
+                'heuristics.py', 'subvolume.py', 'bl_ffhdc.py')
+REARRANGE_CODE = ('rearrange_order.py', 'support_graph.py', 'packing_geometry.py')
+
+
+def code_version(files):
+    digest = hashlib.sha256()
+    for name in files:
+        digest.update(name.encode())
+        with open(os.path.join(BASE_DIR, name), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+class ResultCache:
+    def __init__(self, directory=CACHE_DIR, max_bytes=256 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.code_versions = {}
+
+    def key(self, stage, code_files, **parts):
+        # sha256 over the stage inputs (scenario data, engine name, parameters, ...) and the stage's source code
+        if code_files not in self.code_versions:
+            self.code_versions[code_files] = code_version(code_files)
+        payload = json.dumps({"stage": stage, "code": self.code_versions[code_files], **parts}, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key):
+        path = self.path(key)
+        try:
+            with open(path, 'r') as f:
+                result = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        try:
+            os.utime(path)  # 최근 사용 시각 갱신 (LRU)
+        except FileNotFoundError:
+            pass  # evicted by another process after the read; the result is still good
+        return result
+
+    def put(self, key, result):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(key)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(result, f)
+        os.replace(temp_path, path)
+        self.evict()
+
+    def evict(self):
+        # Drop least recently used entries until the directory fits in max_bytes. Other processes may delete
+        # files while this runs, so a vanished entry is skipped. Temp files left by a writer that was killed
+        # mid-put are removed once they are older than STALE_TEMP_SECONDS.
+        entries = []
+        now = time.time()
+        for entry in os.scandir(self.directory):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            if entry.name.endswith('.tmp'):
+                if now - stat.st_mtime > STALE_TEMP_SECONDS:
+                    self.remove(entry.path)
+            elif entry.name.endswith('.json'):
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self.remove(path)
+            total -= size
+
+    def remove(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def clear(self):
+        if os.path.isdir(self.directory):
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith(('.json', '.tmp')):
+                    self.remove(entry.path)
@@ -0,0 +1,52 @@
+import heapq
+from packing_geometry import OverlapIndex, support_area
+
+# 지지 관계 DAG: 박스는 자신을 받치는 박스들보다 나중에 적재되어야 한다
+
+
+def build_support_graph(packed_items, container_size):
+    # support_graph[item id] = ids of the items it rests on (top face at its z, footprint overlap > 0),
+    # the same test calculate_support_area uses
+    width, length, height = container_size
+    index = OverlapIndex(width, length, height)
+    for item in packed_items:
+        index.insert(item)
+
+    support_graph = {}
+    for item in packed_items:
+        x, y, z = item['position']
+        w, l, h = item['orientation']
+        support_graph[item['id']] = [below['id'] for below in index.items_below(x, y, z, w, l)
+                                     if support_area(x, y, z, item['orientation'], [below]) > 0]
+    return support_graph
+
+
+def support_load_order(packed_items, support_graph, key=lambda item: item['load_order']):
+    # Topological order of the support DAG (Kahn's algorithm); among the boxes whose supports are all
+    # loaded, the one with the smallest key goes next, so an already feasible order is kept as is
+    items_by_id = {item['id']: item for item in packed_items}
+    positions = {item['id']: i for i, item in enumerate(packed_items)}
+    waiting = {item['id']: len(support_graph[item['id']]) for item in packed_items}
+    supported = {item['id']: [] for item in packed_items}
+    for item_id, supports in support_graph.items():
+        for support_id in supports:
+            supported[support_id].append(item_id)
+
+    heap = [(key(item), positions[item['id']], item['id']) for item in packed_items if waiting[item['id']] == 0]
+    heapq.heapify(heap)
+    order = []
+    while heap:
+        _, _, item_id = heapq.heappop(heap)
+        order.append(items_by_id[item_id])
+        for other_id in supported[item_id]:
+            waiting[other_id] -= 1
+            if waiting[other_id] == 0:
+                heapq.heappush(heap, (key(items_by_id[other_id]), positions[other_id], other_id))
+    return order
+
+
+def load_order_violations(packed_items, support_graph):
+    # (item id, support id) pairs where the box is loaded before a box it rests on; empty when feasible
+    load_orders = {item['id']: item['load_order'] for item in packed_items}
+    return [(item_id, support_id) for item_id, supports in support_graph.items() for support_id in supports
+            if load_orders[support_id] >= load_orders[item_id]]
@@ -1,7 +1,15 @@
+import heapq
 import json
 import os
+from bisect import bisect_left
 from collections import defaultdict
-from main_data import create_scenario
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+import numpy as np
+from main_data import load_scenario
+from operations_log import OperationsLog, OperationsLogWriter
+
+PROCESSING_LOCATIONS = ['po1', 'po2', 'po3', 'po4', 'po5']
 
 def is_in_untakeout_field(item1, item2, container_size):
     x1, y1, z1 = item1['position']
@@ -25,6 +33,37 @@ def is_in_untakeout_field(item1, item2, container_size):
 
     return in_front and above and x_overlap and in_container
 
+def packing_arrays(packed_items):
+    # Column arrays of a packing: positions (n, 3), orientations (n, 3), weights (n,), locations (n,)
+    positions = np.array([item['position'] for item in packed_items], dtype=float).reshape(-1, 3)
+    orientations = np.array([item['orientation'] for item in packed_items], dtype=float).reshape(-1, 3)
+    weights = np.array([item['weight'] for item in packed_items], dtype=float)
+    locations = np.array([item['location'] for item in packed_items])
+    return positions, orientations, weights, locations
+
+def blocking_matrix(positions, orientations, locations, container_size):
+    # matrix[..., i, j] is is_in_untakeout_field(item i, item j); leading axes may stack several packings
+    positions = np.asarray(positions, dtype=float)
+    orientations = np.asarray(orientations, dtype=float)
+    x1, y1, z1 = (positions[..., :, None, k] for k in range(3))
+    w1, l1, h1 = (orientations[..., :, None, k] for k in range(3))
+    x2, y2, z2 = (positions[..., None, :, k] for k in range(3))
+    w2 = orientations[..., None, :, 0]
+
+    in_front = y2 < y1 + l1
+    above = z2 >= z1 + h1
+    x_overlap = (x1 < x2 + w2) & (x2 < x1 + w1)
+    in_container = ((0 <= x2) & (x2 < container_size[0]) &
+                    (0 <= y2) & (y2 < container_size[1]) &
+                    (0 <= z2) & (z2 < container_size[2]))
+    matrix = in_front & above & x_overlap & in_container
+
+    # blocker_counts[location][..., i] = how many items bound for location block item i
+    locations = np.asarray(locations)
+    blocker_counts = {location: np.count_nonzero(matrix & (locations[..., None, :] == location), axis=-1)
+                      for location in np.unique(locations)}
+    return matrix, blocker_counts
+
 def is_blocking(item1, item2, container_size):
     return is_in_untakeout_field(item1, item2, container_size)
 
@@ -43,7 +82,43 @@ def calculate_unloading_time(item, human_height=180):
     T = 0.00033 * weight + 0.0015 * moving_distance + 0.0002 * lifting_height
     return T  # Time in minutes
 
-def unload_items(packed_items, container_size):
+def calculate_unloading_times(positions, orientations, weights, human_height=180):
+    # calculate_unloading_time for every item at once; leading axes may stack several packings
+    positions = np.asarray(positions, dtype=float)
+    orientations = np.asarray(orientations, dtype=float)
+    weights = np.asarray(weights, dtype=float)
+    y, z = positions[..., 1], positions[..., 2]
+    h = orientations[..., 2]
+
+    lifting_height = human_height/100 - ((z + h / 2)/100)
+    moving_distance = y/100
+    return 0.00033 * weights + 0.0015 * moving_distance + 0.0002 * lifting_height
+
+def build_blocking_graph(packed_items, container_size):
+    # blocking_graph[item id] = ids of the items that block it, in packed_items order
+    order = {item['id']: index for index, item in enumerate(packed_items)}
+    by_y = sorted(packed_items, key=lambda item: item['position'][1])
+    ys = [item['position'][1] for item in by_y]
+
+    blocking_graph = {}
+    for item in packed_items:
+        # Only items starting in front of the item's back face can block it (y-sorted sweep)
+        end = bisect_left(ys, item['position'][1] + item['orientation'][1])
+        blockers = [other['id'] for other in by_y[:end] if is_in_untakeout_field(item, other, container_size)]
+        blockers.sort(key=order.__getitem__)
+        blocking_graph[item['id']] = blockers
+    return blocking_graph
+
+def unload_items(packed_items, container_size, blocking_graph=None, processing_locations=PROCESSING_LOCATIONS, log=None):
+    # log receives every operation; the default OperationsLog keeps the nested list that is returned
+    if log is None:
+        log = OperationsLog()
+    if blocking_graph is None:
+        blocking_graph = build_blocking_graph(packed_items, container_size)
+    items_by_id = {item['id']: item for item in packed_items}
+    positions, orientations, weights, _ = packing_arrays(packed_items)
+    unloading_times = dict(zip([item['id'] for item in packed_items], calculate_unloading_times(positions, orientations, weights).tolist()))
+
     location_groups = defaultdict(list)
     for item in packed_items:
         location_groups[item['location']].append(item)
@@ -51,31 +126,30 @@ def unload_items(packed_items, container_size):
     total_operations = 0
     unloading_cost = 0
     reloading_count = 0
-    unloaded_items = []
-    operations_log = []
+    unloaded_ids = set()
     unload_order = 1
     temporarily_unloaded = []
+    temporarily_unloaded_ids = set()
 
-    processing_locations = ['po1', 'po2', 'po3', 'po4', 'po5']
-    
     for location in processing_locations:
-        operations_log.append({"step": f"Processing location: {location}", "items": []})
+        log.step(location)
         
         # Sort items by y coordinate (front to back)
         items_to_unload = sorted(location_groups[location], key=lambda x: (x['position'][1], -x['position'][2]))        
-        while items_to_unload:
-            item = items_to_unload.pop(0)
-            remaining_items = [item for item in packed_items if item not in unloaded_items]
-            blocking_items = [other_item for other_item in remaining_items 
-                              if is_blocking(item, other_item, container_size)]
+        for item in items_to_unload:
+            # Already unloaded as a blocking item of an earlier one
+            if item['id'] in unloaded_ids:
+                continue
+            blocking_items = [items_by_id[blocking_id] for blocking_id in blocking_graph[item['id']]
+                              if blocking_id not in unloaded_ids]
 
             for blocking_item in blocking_items:
                 if blocking_item['location'] == location:
                     # Unload the blocking item if it's for this location
-                    unloading_time = calculate_unloading_time(blocking_item)
+                    unloading_time = unloading_times[blocking_item['id']]
                     unloading_cost += unloading_time
-                    unloaded_items.append(blocking_item)
-                    operations_log[-1]["items"].append({
+                    unloaded_ids.add(blocking_item['id'])
+                    log.add({
                         "action": "Unload blocking item",
                         "item_id": blocking_item['id'],
                         "location": blocking_item['location'],
@@ -85,13 +159,12 @@ def unload_items(packed_items, container_size):
                     })
                     total_operations += 1
                     unload_order += 1
-                    if blocking_item in items_to_unload:
-                        items_to_unload.remove(blocking_item)
                 else:
                     # Temporarily unload the blocking item if it's for a different location
-                    if blocking_item not in temporarily_unloaded:
+                    if blocking_item['id'] not in temporarily_unloaded_ids:
                         temporarily_unloaded.append(blocking_item)
-                        operations_log[-1]["items"].append({
+                        temporarily_unloaded_ids.add(blocking_item['id'])
+                        log.add({
                             "action": "Temporarily unload blocking item",
                             "item_id": blocking_item['id'],
                             "location": blocking_item['location'],
@@ -102,10 +175,10 @@ def unload_items(packed_items, container_size):
                         unloading_cost += 1
 
             # Unload the item
-            unloading_time = calculate_unloading_time(item)
+            unloading_time = unloading_times[item['id']]
             unloading_cost += unloading_time
-            unloaded_items.append(item)
-            operations_log[-1]["items"].append({
+            unloaded_ids.add(item['id'])
+            log.add({
                 "action": "Unload",
                 "item_id": item['id'],
                 "location": item['location'],
@@ -122,7 +195,7 @@ def unload_items(packed_items, container_size):
             temporarily_unloaded.sort(key=lambda x: (-x['position'][1], x['position'][2]))
             
             for temp_item in temporarily_unloaded:
-                operations_log[-1]["items"].append({
+                log.add({
                     "action": "Reload temporarily unloaded item",
                     "item_id": temp_item['id'],
                     "location": temp_item['location'],
@@ -134,12 +207,346 @@ def unload_items(packed_items, container_size):
                 unloading_cost += 1
             
             temporarily_unloaded.clear()  # Clear the list after reloading
+            temporarily_unloaded_ids.clear()
+
+    return total_operations, unloading_cost, reloading_count, log.operations
+
+def sequence_unloading(packed_items, container_size, blocking_graph=None, processing_locations=PROCESSING_LOCATIONS,
+                       log=None):
+    # Minimum-cost plan on the blocking DAG, same return values as unload_items. A box can only come out after
+    # every box that blocks it, and blockers of blockers too, so each stop must move exactly the blocker closure
+    # of its boxes. The cost is fixed by that set. Totals can exceed unload_items, whose greedy only clears
+    # direct blockers.
+    if blocking_graph is None:
+        blocking_graph = build_blocking_graph(packed_items, container_size)
+    if log is None:
+        log = OperationsLog()
+    items_by_id = {item['id']: item for item in packed_items}
+    positions, orientations, weights, _ = packing_arrays(packed_items)
+    unloading_times = dict(zip([item['id'] for item in packed_items],
+                               calculate_unloading_times(positions, orientations, weights).tolist()))
+
+    total_operations = 0
+    unloading_cost = 0
+    reloading_count = 0
+    unloaded_ids = set()
+    unload_order = 1
+
+    for location in processing_locations:
+        log.step(location)
+
+        # Every box that has to come out before this stop's boxes can
+        closure = set()
+        stack = [item['id'] for item in packed_items if item['location'] == location and item['id'] not in unloaded_ids]
+        while stack:
+            item_id = stack.pop()
+            if item_id in closure:
+                continue
+            closure.add(item_id)
+            stack.extend(blocking_id for blocking_id in blocking_graph[item_id]
+                         if blocking_id not in unloaded_ids and blocking_id not in closure)
+
+        # Kahn's algorithm on the closure, front/top boxes first among the free ones
+        waiting = {item_id: 0 for item_id in closure}
+        blocked = defaultdict(list)
+        for item_id in closure:
+            for blocking_id in blocking_graph[item_id]:
+                if blocking_id in closure:
+                    waiting[item_id] += 1
+                    blocked[blocking_id].append(item_id)
+
+        def key(item_id):
+            item = items_by_id[item_id]
+            return (item['position'][1], -item['position'][2], item_id)
+
+        heap = [key(item_id) for item_id, count in waiting.items() if count == 0]
+        heapq.heapify(heap)
+        temporarily_unloaded = []
+        while heap:
+            item = items_by_id[heapq.heappop(heap)[2]]
+            if item['location'] == location:
+                unloading_time = unloading_times[item['id']]
+                unloading_cost += unloading_time
+                unloaded_ids.add(item['id'])
+                log.add({
+                    "action": "Unload",
+                    "item_id": item['id'],
+                    "location": item['location'],
+                    "position": item['position'],
+                    "unload_order": unload_order,
+                    "unloading_time": unloading_time
+                })
+                unload_order += 1
+            else:
+                temporarily_unloaded.append(item)
+                log.add({
+                    "action": "Temporarily unload blocking item",
+                    "item_id": item['id'],
+                    "location": item['location'],
+                    "position": item['position'],
+                    "unloading_cost": 1
+                })
+                unloading_cost += 1
+            total_operations += 1
+            for blocked_id in blocked[item['id']]:
+                waiting[blocked_id] -= 1
+                if waiting[blocked_id] == 0:
+                    heapq.heappush(heap, key(blocked_id))
+
+        if location != processing_locations[-1]:
+            temporarily_unloaded.sort(key=lambda x: (-x['position'][1], x['position'][2]))
+            for temp_item in temporarily_unloaded:
+                log.add({
+                    "action": "Reload temporarily unloaded item",
+                    "item_id": temp_item['id'],
+                    "location": temp_item['location'],
+                    "position": temp_item['position'],
+                    "unloading_cost": 1
+                })
+                total_operations += 1
+                reloading_count += 1
+                unloading_cost += 1
+
+    return total_operations, unloading_cost, reloading_count, log.operations
+
+UNLOAD_SOLVERS = {
+    'greedy': unload_items,
+    'dag': sequence_unloading
+}
+
+def location_unloading_cost(location, location_items, blocking_graph, items_by_id, earlier_ids, reload=True):
+    # Cost of one stop of unload_items without the log. Every item of an earlier stop is already out,
+    # so the outcome depends only on this stop's items and earlier_ids.
+    operations = 0
+    cost = 0
+    unloaded_ids = set()
+    temporarily_unloaded_ids = set()
+
+    for item in sorted(location_items, key=lambda x: (x['position'][1], -x['position'][2])):
+        if item['id'] in unloaded_ids:
+            continue
+        blocking_ids = [blocking_id for blocking_id in blocking_graph[item['id']]
+                        if blocking_id not in earlier_ids and blocking_id not in unloaded_ids]
+        for blocking_id in blocking_ids:
+            blocking_item = items_by_id[blocking_id]
+            if blocking_item['location'] == location:
+                cost += calculate_unloading_time(blocking_item)
+                unloaded_ids.add(blocking_id)
+                operations += 1
+            elif blocking_id not in temporarily_unloaded_ids:
+                temporarily_unloaded_ids.add(blocking_id)
+                operations += 1
+                cost += 1
+
+        cost += calculate_unloading_time(item)
+        unloaded_ids.add(item['id'])
+        operations += 1
+
+    reloads = len(temporarily_unloaded_ids) if reload else 0
+    return operations + reloads, cost + reloads, reloads
+
+class UnloadingEvaluator:
+    # unload_items totals kept up to date while boxes are moved one or two at a time.
+    # A move only rebuilds the blocking relations of the moved box and re-costs the stops they touch.
+    def __init__(self, packed_items, container_size, blocking_graph=None, processing_locations=PROCESSING_LOCATIONS):
+        self.container_size = container_size
+        self.processing_locations = list(processing_locations)
+        self.items_by_id = {item['id']: dict(item) for item in packed_items}
+        self.order = {item['id']: index for index, item in enumerate(packed_items)}
+        if blocking_graph is None:
+            blocking_graph = build_blocking_graph(packed_items, container_size)
+        self.blocking_graph = {item_id: list(blockers) for item_id, blockers in blocking_graph.items()}
+
+        self.location_groups = defaultdict(list)
+        for item in self.items_by_id.values():
+            self.location_groups[item['location']].append(item)
+        self.earlier_ids = {}
+        earlier_ids = set()
+        for location in self.processing_locations:
+            self.earlier_ids[location] = frozenset(earlier_ids)
+            earlier_ids.update(item['id'] for item in self.location_groups[location])
 
-    return total_operations, unloading_cost, reloading_count, operations_log
+        self.stop_costs = {}
+        for location in self.processing_locations:
+            self.update_location(location)
 
-def process_unloading(scenario_number, method):
-    # create_scenario 함수를 사용하여 컨테이너 크기를 가져옵니다
-    container_size, _ = create_scenario(scenario_number)
+    def packed_items(self):
+        return sorted(self.items_by_id.values(), key=lambda item: self.order[item['id']])
+
+    def update_location(self, location):
+        if location not in self.earlier_ids:
+            return
+        reload = location != self.processing_locations[-1]
+        self.stop_costs[location] = location_unloading_cost(location, self.location_groups[location], self.blocking_graph,
+                                                            self.items_by_id, self.earlier_ids[location], reload)
+
+    def totals(self):
+        # (total_operations, unloading_cost, reloading_count), same as the first three values of unload_items
+        costs = [self.stop_costs[location] for location in self.processing_locations]
+        return sum(c[0] for c in costs), sum(c[1] for c in costs), sum(c[2] for c in costs)
+
+    def relink(self, item_id):
+        # Rebuild the blocking relations of one box; returns the ids whose blocker lists changed
+        item = self.items_by_id[item_id]
+        changed = {item_id}
+        blockers = []
+        for other_id, other in self.items_by_id.items():
+            if other_id == item_id:
+                continue
+            if is_in_untakeout_field(item, other, self.container_size):
+                blockers.append(other_id)
+            other_blockers = self.blocking_graph[other_id]
+            blocks = is_in_untakeout_field(other, item, self.container_size)
+            if blocks != (item_id in other_blockers):
+                if blocks:
+                    other_blockers.append(item_id)
+                    other_blockers.sort(key=self.order.__getitem__)
+                else:
+                    other_blockers.remove(item_id)
+                changed.add(other_id)
+        blockers.sort(key=self.order.__getitem__)
+        self.blocking_graph[item_id] = blockers
+        return changed
+
+    def apply(self, moves):
+        for item_id, position, orientation in moves:
+            item = self.items_by_id[item_id]
+            item['position'] = list(position)
+            if orientation is not None:
+                item['orientation'] = list(orientation)
+        changed = set()
+        for item_id, _, _ in moves:
+            changed |= self.relink(item_id)
+        for location in {self.items_by_id[item_id]['location'] for item_id in changed}:
+            self.update_location(location)
+        _, unloading_cost, reloading_count = self.totals()
+        return unloading_cost, reloading_count
+
+    def move(self, item_id, new_position, new_orientation=None):
+        return self.apply([(item_id, new_position, new_orientation)])
+
+    def swap(self, item_a, item_b):
+        # Exchange the positions of two boxes; each keeps its own orientation
+        position_a = self.items_by_id[item_a]['position']
+        position_b = self.items_by_id[item_b]['position']
+        return self.apply([(item_a, position_b, None), (item_b, position_a, None)])
+
+def blocking_graph_from_matrix(matrix, ids):
+    # Same dict as build_blocking_graph; the blockers of each row come out in packed order
+    return {ids[i]: [ids[j] for j in np.flatnonzero(row)] for i, row in enumerate(matrix)}
+
+def packings_from_arrays(positions, orientations, weights, locations, ids=None):
+    # Packed item lists from stacked (k, n, ...) arrays; locations and ids may be shared (n,) arrays
+    positions = np.asarray(positions)
+    orientations = np.asarray(orientations)
+    count, n = positions.shape[:2]
+    weights = np.broadcast_to(weights, (count, n))
+    locations = np.broadcast_to(locations, (count, n))
+    ids = np.broadcast_to(np.arange(n) if ids is None else ids, (count, n))
+    return [[{"id": int(ids[k, i]),
+              "position": positions[k, i].tolist(),
+              "orientation": orientations[k, i].tolist(),
+              "location": str(locations[k, i]),
+              "weight": float(weights[k, i])} for i in range(n)] for k in range(count)]
+
+def unload_to_file(packed_items, container_size, log_file, blocking_graph=None, solver='greedy'):
+    # .jsonl logs are streamed while unloading; any other path gets the nested list as indented JSON
+    unload = UNLOAD_SOLVERS[solver]
+    if log_file.endswith('.jsonl'):
+        with OperationsLogWriter(log_file) as log:
+            return unload(packed_items, container_size, blocking_graph, log=log)[:3]
+    total_operations, unloading_cost, reloading_count, operations_log = unload(packed_items, container_size,
+                                                                              blocking_graph)
+    with open(log_file, 'w') as f:
+        json.dump(operations_log, f, indent=4)
+    return total_operations, unloading_cost, reloading_count
+
+def unloading_totals(packed_items, container_size, log_file=None):
+    positions, orientations, _, locations = packing_arrays(packed_items)
+    matrix, _ = blocking_matrix(positions, orientations, locations, container_size)
+    blocking_graph = blocking_graph_from_matrix(matrix, [item['id'] for item in packed_items])
+    if log_file is not None:
+        return unload_to_file(packed_items, container_size, log_file, blocking_graph)
+    return unload_items(packed_items, container_size, blocking_graph)[:3]
+
+def evaluate_unloading(packings, container_size, processes=None, log_files=None):
+    # Unloading totals of many packings as arrays; operation logs are written only when log_files is given
+    if log_files is None:
+        log_files = [None] * len(packings)
+
+    if len(packings) > 1 and processes != 1:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            results = list(executor.map(unloading_totals, packings, repeat(container_size), log_files,
+                                        chunksize=max(1, len(packings) // 32)))
+    else:
+        results = [unloading_totals(packed_items, container_size, log_file)
+                   for packed_items, log_file in zip(packings, log_files)]
+
+    results = np.array(results, dtype=float).reshape(-1, 3)
+    return {
+        'total_operations': results[:, 0].astype(int),
+        'unloading_cost': results[:, 1],
+        'reloading_count': results[:, 2].astype(int)
+    }
+
+def route_stop_costs(stop_index, stops, packed_items, blocking_graph):
+    # location_unloading_cost of one stop after every subset of the other stops (bit masks over stops)
+    items_by_id = {item['id']: item for item in packed_items}
+    stop_ids = [[item['id'] for item in packed_items if item['location'] == stop] for stop in stops]
+    stop = stops[stop_index]
+    others = (1 << len(stops)) - 1 & ~(1 << stop_index)
+
+    costs = {}
+    for mask in range(others + 1):
+        if mask & ~others:
+            continue
+        earlier_ids = {item_id for i, ids in enumerate(stop_ids) if mask >> i & 1 for item_id in ids}
+        # No reloading after the last stop of the route
+        costs[mask] = location_unloading_cost(stop, [items_by_id[item_id] for item_id in stop_ids[stop_index]],
+                                              blocking_graph, items_by_id, earlier_ids, reload=mask != others)
+    return costs
+
+def optimize_route(packed_items, container_size, stops=None, blocking_graph=None, processes=None):
+    # Cheapest order of the delivery stops by unloading_cost. A stop's cost depends only on which stops came
+    # before it, so a DP over stop subsets is exact with k * 2^(k-1) stop evaluations instead of k! routes.
+    if stops is None:
+        stops = sorted({item['location'] for item in packed_items}, key=lambda location: (len(location), location))
+    stops = list(stops)
+    if blocking_graph is None:
+        blocking_graph = build_blocking_graph(packed_items, container_size)
+
+    indices = range(len(stops))
+    if len(stops) > 1 and processes != 1:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            stop_costs = list(executor.map(route_stop_costs, indices, repeat(stops), repeat(packed_items),
+                                           repeat(blocking_graph)))
+    else:
+        stop_costs = [route_stop_costs(i, stops, packed_items, blocking_graph) for i in indices]
+
+    # best[mask] = (unloading_cost, total_operations, reloading_count, route) over the stops in mask
+    best = {0: (0, 0, 0, [])}
+    for mask in range(1 << len(stops)):
+        if mask not in best:
+            continue
+        cost, operations, reloads, route = best[mask]
+        for i in indices:
+            if mask >> i & 1:
+                continue
+            stop_operations, stop_cost, stop_reloads = stop_costs[i][mask]
+            candidate = (cost + stop_cost, operations + stop_operations, reloads + stop_reloads, route + [stops[i]])
+            if mask | 1 << i not in best or candidate[0] < best[mask | 1 << i][0]:
+                best[mask | 1 << i] = candidate
+
+    unloading_cost, total_operations, reloading_count, route = best[(1 << len(stops)) - 1]
+    return route, {
+        'total_operations': total_operations,
+        'unloading_cost': unloading_cost,
+        'reloading_count': reloading_count
+    }
+
+def process_unloading(scenario_number, method, log_format='json', solver='greedy'):
+    # load_scenario 함수를 사용하여 컨테이너 크기를 가져옵니다
+    container_size, _ = load_scenario(scenario_number)
 
     if method == "original":
         scenario_file = f'./scenario/rearranged_items_scenario_{scenario_number}_original.json'
@@ -156,11 +563,10 @@ def process_unloading(scenario_number, method):
     with open(scenario_file, 'r') as f:
         packed_items = json.load(f)
 
-    total_operations, unloading_cost, reloading_count, operations_log = unload_items(packed_items, container_size)
-    
-    result_file = f'./scenario/unloading_operations_scenario_{scenario_number}_{method}.json'
-    with open(result_file, 'w') as f:
-        json.dump(operations_log, f, indent=4)
+    # log_format 'jsonl' streams the log instead of dumping it at the end; solver 'dag' plans on the blocking DAG
+    result_file = f'./scenario/unloading_operations_scenario_{scenario_number}_{method}.{log_format}'
+    total_operations, unloading_cost, reloading_count = unload_to_file(packed_items, container_size, result_file,
+                                                                       solver=solver)
 
     print(f"언로딩 작업 결과가 '{result_file}'에 저장되었습니다.")
 
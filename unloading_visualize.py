@@ -1,17 +1,21 @@
 import json
+import os
 import matplotlib.pyplot as plt
 from mpl_toolkits.mplot3d import Axes3D
 import matplotlib.animation as animation
 from main_data import container_size
+from operations_log import load_operations_log
 
 # Load the packed items
 scenario_number = int(input("Enter the scenario number: "))
 with open(f'./scenario/rearranged_items_scenario_{scenario_number}.json', 'r') as f:
     packed_items = json.load(f)
 
-# Load the unloading operations
-with open(f'./scenario/unloading_operations_scenario_{scenario_number}.json', 'r') as f:
-    operations = json.load(f)
+# Load the unloading operations (streamed .jsonl logs are rebuilt into the same nested list)
+operations_file = f'./scenario/unloading_operations_scenario_{scenario_number}.jsonl'
+if not os.path.exists(operations_file):
+    operations_file = f'./scenario/unloading_operations_scenario_{scenario_number}.json'
+operations = load_operations_log(operations_file, packed_items)
 
 # Create a figure and 3D axis
 fig = plt.figure(figsize=(12, 8))
@@ -2,11 +2,11 @@ import json
 import matplotlib.pyplot as plt
 from mpl_toolkits.mplot3d.art3d import Poly3DCollection
 import matplotlib.animation as animation
-from main_data import create_scenario
+from main_data import load_scenario
 
 def create_packing_animation(scenario_number, packing_method, save_gif=False):
-    # Get container size from create_scenario function
-    container_size, _ = create_scenario(scenario_number)
+    # Get container size from load_scenario function
+    container_size, _ = load_scenario(scenario_number)
 
     # Load packed items from the JSON file based on the chosen method
     if packing_method == 'heuristic':